@@ -29,6 +29,8 @@ class Mapper(VRT):
     """
     """
     input_filename = ''
+    # Cached (input_filename, times) - see times
+    _times = None
 
     def __init__(self, filename, gdal_dataset, gdal_metadata, *args, **kwargs):
 
@@ -91,21 +93,28 @@ class Mapper(VRT):
         NOTE: This cannot be done with gdal because the time variable is a
         vector
 
+        The times are cached together with the input filename they were read
+        from, so the time variable is only read and converted once. A copy is
+        returned to keep the cache intact.
+
         '''
+        if self._times is not None and self._times[0] == self.input_filename:
+            return self._times[1].copy()
+
         ds = Dataset(self.input_filename)
 
         # Get datetime object of epoch and time_units string
         time_units = self._time_reference(ds=ds)
 
-        # Get all times - consider caching to save time (see
-        # nansat/mappers/opendap.py)
+        # Get all times
         times = ds.variables[self._timevarname(ds=ds)]
 
         # Create numpy array of np.datetime64 times (provide epoch to save time)
         tt = np.array([self._time_count_to_np_datetime64(tn,
             time_reference=time_units) for tn in times])
+        self._times = (self.input_filename, tt)
 
-        return tt
+        return tt.copy()
 
     def _time_reference(self, ds=None):
         """ Get the time reference of the dataset
@@ -11,14 +11,30 @@ from nansat.mappers.mapper_netcdf_cf import Mapper
 
 from mock import patch, Mock, DEFAULT
 
+# Coordinate values of the test files, precomputed in the on-disk dtype ('i4')
+LATITUDES = np.linspace(0, 60, 30).astype('i4')
+LONGITUDES = np.linspace(0, 20, 20).astype('i4')
+HEIGHTS = np.arange(10, 110, 10, dtype='i4')
+
+# Keep the test files in memory (tmpfs) where available - gdal needs a real path, so
+# netCDF4's diskless mode cannot be used
+TMP_DIR = '/dev/shm' if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK) else None
+
 class NetCDF_CF_Tests(unittest.TestCase):
 
-    def setUp(self):
-        fd, self.tmp_filename = tempfile.mkstemp(suffix='.nc')
-        ds = Dataset(self.tmp_filename, 'w')
-        lat_sz = 30
-        lon_sz = 20
-        height_sz = 10
+    @classmethod
+    def setUpClass(cls):
+        # Look up the netCDF driver once, so the tests can check that the NETCDF:
+        # subdatasets are opened with it
+        cls.netcdf_driver = gdal.GetDriverByName('netCDF')
+        if cls.netcdf_driver is None:
+            raise unittest.SkipTest('GDAL is built without the netCDF driver')
+
+        fd, cls.tmp_filename = tempfile.mkstemp(suffix='.nc', dir=TMP_DIR)
+        ds = Dataset(cls.tmp_filename, 'w')
+        lat_sz = LATITUDES.size
+        lon_sz = LONGITUDES.size
+        height_sz = HEIGHTS.size
 
         # Set dimensions
         ds.createDimension('latitude', lat_sz)
@@ -33,24 +49,18 @@ class NetCDF_CF_Tests(unittest.TestCase):
         times.units = 'seconds since 1970-01-01 00:00'
         times.standard_name = 'time'
         times.long_name = 'time'
-        times[0] = np.ma.MaskedArray(data = 1560610800.0, mask =
-                False, fill_value = 1e+20)
-        times[1] = np.ma.MaskedArray(data = 1560621600.0, mask =
-                False, fill_value = 1e+20)
-        times[2] = np.ma.MaskedArray(data = 1560632400.0, mask =
-                False, fill_value = 1e+20)
+        times[:] = np.array([1560610800, 1560621600, 1560632400], dtype='i4')
 
         heights = ds.createVariable('height', 'i4', ('height'))
-        heights[:] = np.linspace(10, 100, height_sz)
+        heights[:] = HEIGHTS
 
         lats = ds.createVariable('latitude', 'i4', ('latitude'))
-        lats[:] = np.linspace(0, 60, lat_sz)
+        lats[:] = LATITUDES
 
         lons = ds.createVariable('longitude', 'i4', ('longitude'))
-        lons[:] = np.linspace(0, 20, lon_sz)
+        lons[:] = LONGITUDES
 
-        # Spatial variables 2d, 3d, and 4d
-        var2d = ds.createVariable('var2d', 'i4', ('latitude', 'longitude'))
+        # Spatial variables 3d, 4d and 5d
         var3d = ds.createVariable('var3d', 'i4', ('time', 'latitude', 'longitude'))
         var3d.standard_name = 'x_wind'
         var4d = ds.createVariable('var4d', 'f4', ('time', 'pressure', 'latitude', 'longitude'))
@@ -69,20 +79,14 @@ class NetCDF_CF_Tests(unittest.TestCase):
         pressures.long_name = 'pressure'
         pressures.positive = 'down'
         pressures.units = 'hPa'
-        pressures[0] = np.ma.MaskedArray(data = 200., mask = False, fill_value = 1e+20)
-        pressures[1] = np.ma.MaskedArray(data = 250., mask = False, fill_value = 1e+20)
-        pressures[2] = np.ma.MaskedArray(data = 300., mask = False, fill_value = 1e+20)
-        pressures[3] = np.ma.MaskedArray(data = 400., mask = False, fill_value = 1e+20)
-        pressures[4] = np.ma.MaskedArray(data = 500., mask = False, fill_value = 1e+20)
-        pressures[5] = np.ma.MaskedArray(data = 700., mask = False, fill_value = 1e+20)
-        pressures[6] = np.ma.MaskedArray(data = 800., mask = False, fill_value = 1e+20)
+        pressures[:] = np.array([200, 250, 300, 400, 500, 700, 800], dtype='i4')
         ds.close()
         os.close(fd) # Just in case - see https://www.logilab.org/blogentry/17873
 
-        fd, self.tmp_filename_xy = tempfile.mkstemp(suffix='.nc')
-        ds = Dataset(self.tmp_filename_xy, 'w')
-        y_sz = 30
-        x_sz = 20
+        fd, cls.tmp_filename_xy = tempfile.mkstemp(suffix='.nc', dir=TMP_DIR)
+        ds = Dataset(cls.tmp_filename_xy, 'w')
+        y_sz = LATITUDES.size
+        x_sz = LONGITUDES.size
 
         # Set dimensions
         ds.createDimension('y', y_sz)
@@ -94,31 +98,25 @@ class NetCDF_CF_Tests(unittest.TestCase):
         times.units = 'seconds since 1970-01-01 00:00'
         times.standard_name = 'time'
         times.long_name = 'time'
-        times[0] = np.ma.MaskedArray(data = 1560610800.0, mask =
-                False, fill_value = 1e+20)
-        times[1] = np.ma.MaskedArray(data = 1560621600.0, mask =
-                False, fill_value = 1e+20)
-        times[2] = np.ma.MaskedArray(data = 1560632400.0, mask =
-                False, fill_value = 1e+20)
+        times[:] = np.array([1560610800, 1560621600, 1560632400], dtype='i4')
 
         ys = ds.createVariable('y', 'i4', ('y'))
-        ys[:] = np.linspace(0, 60, y_sz)
+        ys[:] = LATITUDES
 
         xs = ds.createVariable('x', 'i4', ('x'))
-        xs[:] = np.linspace(0, 20, x_sz)
+        xs[:] = LONGITUDES
 
-        # Spatial variables 2d and 3d
-        var2d = ds.createVariable('var2d', 'i4', ('y', 'x'))
+        # Spatial variables 3d
         var3d = ds.createVariable('var3d', 'i4', ('some_times', 'y', 'x'))
         var3d.standard_name = 'x_wind'
 
         ds.close()
         os.close(fd) # Just in case - see https://www.logilab.org/blogentry/17873
 
-        fd, self.tmp_filename_no_time_var = tempfile.mkstemp(suffix='.nc')
-        ds = Dataset(self.tmp_filename_no_time_var, 'w')
-        y_sz = 30
-        x_sz = 20
+        fd, cls.tmp_filename_no_time_var = tempfile.mkstemp(suffix='.nc', dir=TMP_DIR)
+        ds = Dataset(cls.tmp_filename_no_time_var, 'w')
+        y_sz = LATITUDES.size
+        x_sz = LONGITUDES.size
 
         # Set dimensions
         ds.createDimension('y', y_sz)
@@ -127,23 +125,24 @@ class NetCDF_CF_Tests(unittest.TestCase):
         # 1d "dimensional" variables i.e lats, times, etc.
         ys = ds.createVariable('y', 'i4', ('y'))
         ys.standard_name = 'projection_y_coordinate'
-        ys[:] = np.linspace(0, 60, y_sz)
+        ys[:] = LATITUDES
 
         xs = ds.createVariable('x', 'i4', ('x'))
         xs.standard_name = 'projection_x_coordinate'
-        xs[:] = np.linspace(0, 20, x_sz)
+        xs[:] = LONGITUDES
 
-        # Spatial variables 2d and 3d
+        # Spatial variables 2d
         var2d = ds.createVariable('var2d', 'i4', ('y', 'x'))
         var2d.standard_name = 'x_wind'
 
         ds.close()
         os.close(fd) # Just in case - see https://www.logilab.org/blogentry/17873
 
-    def tearDown(self):
-        os.unlink(self.tmp_filename)
-        os.unlink(self.tmp_filename_xy)
-        os.unlink(self.tmp_filename_no_time_var)
+    @classmethod
+    def tearDownClass(cls):
+        os.unlink(cls.tmp_filename)
+        os.unlink(cls.tmp_filename_xy)
+        os.unlink(cls.tmp_filename_no_time_var)
 
     @patch('nansat.mappers.mapper_netcdf_cf.Mapper.__init__')
     def test__timevarname(self, mock_init):
@@ -253,6 +252,52 @@ class NetCDF_CF_Tests(unittest.TestCase):
                 bands=['x_wind'])
         self.assertEqual(bdict['src']['SourceBand'], 1)
 
+    @patch('nansat.mappers.mapper_netcdf_cf.Mapper.__init__')
+    def test_times(self, mock_init):
+        mock_init.return_value = None
+        mm = Mapper()
+        mm.input_filename = self.tmp_filename
+        with patch('nansat.mappers.mapper_netcdf_cf.Dataset', wraps=Dataset) as mock_ds:
+            tt = mm.times()
+            self.assertEqual(tt[0], np.datetime64('2019-06-15T15:00:00.000000'))
+            self.assertEqual(mock_ds.call_count, 1)
+            # Modifying the returned array should not change the cached times
+            tt[0] = np.datetime64('2000-01-01')
+            tt = mm.times()
+            self.assertEqual(tt[0], np.datetime64('2019-06-15T15:00:00.000000'))
+            # The times are cached, so the file is not opened again..
+            self.assertEqual(mock_ds.call_count, 1)
+            # ..unless the input file changes
+            mm.input_filename = self.tmp_filename_xy
+            tt = mm.times()
+            self.assertEqual(tt.size, 3)
+            self.assertEqual(mock_ds.call_count, 2)
+
+    @patch('nansat.mappers.mapper_netcdf_cf.Mapper.__init__')
+    def test__get_band_from_subfile__cached_times(self, mock_init):
+        mock_init.return_value = None
+        mm = Mapper()
+        mm.input_filename = self.tmp_filename
+        fn = 'NETCDF:"' + self.tmp_filename + '":var4d'
+        netcdf_dim = {'time': np.datetime64('2019-06-15T18:00')}
+        convert = Mapper._time_count_to_np_datetime64
+        with patch.object(Mapper, '_time_count_to_np_datetime64', autospec=True,
+                side_effect=convert) as mock_convert:
+            # times() converts all time counts with the time reference of the
+            # dataset, i.e., 3 conversions each time the time variable is read
+            def count_time_variable_conversions():
+                return len([c for c in mock_convert.call_args_list
+                    if 'time_reference' in c[1]])
+            # The first search in time reads the time variable..
+            bdict = mm._get_band_from_subfile(fn, netcdf_dim=netcdf_dim, bands=['x_wind'])
+            self.assertEqual(bdict['src']['SourceBand'], 8) # 2nd time, 1st pressure
+            self.assertEqual(count_time_variable_conversions(), 3)
+            # ..and the following searches use the cached times
+            for i in range(3):
+                bdict = mm._get_band_from_subfile(fn, netcdf_dim=netcdf_dim, bands=['x_wind'])
+                self.assertEqual(bdict['src']['SourceBand'], 8) # 2nd time, 1st pressure
+            self.assertEqual(count_time_variable_conversions(), 3)
+
     @patch('nansat.mappers.mapper_netcdf_cf.Mapper.__init__')
     def test_buggy_var(self, mock_init):
         """ The last band dimensions should be latitude and longitude - otherwise gdal will fail in
@@ -272,6 +317,7 @@ class NetCDF_CF_Tests(unittest.TestCase):
         self.assertEqual(bdict['dst']['NETCDF_DIM_latitude'], '0')
         self.assertEqual(bdict['dst']['time_iso_8601'], np.datetime64('2019-06-15T15:00:00.000000'))
         subds = gdal.Open(fn)
+        self.assertEqual(subds.GetDriver().ShortName, self.netcdf_driver.ShortName)
         self.assertEqual(subds.RasterXSize, 7) # size of pressure dimension
         self.assertEqual(subds.RasterYSize, 20) # size of longitude dimension
 
@@ -30,7 +30,6 @@ class OpenDAPTests(unittest.TestCase):
         ds = Dataset(tmp_filename, 'w')
         lat_sz = 30
         lon_sz = 20
-        values = np.random.random_sample((lat_sz, lon_sz))
 
         # Set dimensions
         ds.createDimension('lat', lat_sz)